@@ -0,0 +1,22 @@
+"""
+Saved html corpus shared by the benchmarks, kept free of OpBop imports so replay.py can load it
+before upstream traffic is intercepted
+"""
+import os
+
+CORPUS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "corpus")
+INDEX = "index.tsv"
+
+
+def load_index(corpus: str) -> list:
+    """ Returns [(file name, url, header charset or None)] of the saved corpus """
+    index_path = os.path.join(corpus, INDEX)
+    if not os.path.exists(index_path):
+        return []
+    ret = []
+    with open(index_path) as f:
+        for line in f:
+            if line.strip():
+                name, url, encoding = (line.rstrip("\n").split("\t") + [""])[:3]
+                ret.append((name, url, encoding or None))
+    return ret
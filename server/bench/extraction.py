@@ -0,0 +1,138 @@
+"""
+Benchmark of ArticleExtractor against the full newspaper pipeline over a saved corpus of html pages
+
+usage (from server/):
+    python bench/extraction.py save urls.txt        saves each url (one per line) into the corpus
+    python bench/extraction.py run                  times both engines and compares their text and titles
+"""
+import argparse
+import os
+import sys
+import time
+from collections import Counter
+from statistics import mean, median
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import requests
+import tldextract
+from extractor import ArticleExtractor
+from newsutils import NewsUtils
+from corpus import CORPUS, INDEX, load_index
+
+
+def save(urls_file: str, corpus: str) -> None:
+    """ Downloads every url in urls_file into the corpus, indexed by file name """
+    os.makedirs(corpus, exist_ok=True)
+    index_path = os.path.join(corpus, INDEX)
+    count = len(load_index(corpus))
+    with open(urls_file) as f, open(index_path, "a") as index:
+        for url in (line.strip() for line in f):
+            if not url:
+                continue
+            try:
+                response = requests.get(url, headers=NewsUtils.HEADERS, timeout=NewsUtils.TIMEOUT)
+                response.raise_for_status()
+            except requests.RequestException as e:
+                print(f"skipped {url}: {e}")
+                continue
+            # Raw bytes plus the header charset, so pages decode exactly like they do in parse_maintext_title
+            encoding = NewsUtils.header_encoding(response) or ""
+            name = f"{count:04d}.html"
+            with open(os.path.join(corpus, name), "wb") as page:
+                page.write(response.content)
+            index.write(f"{name}\t{url}\t{encoding}\n")
+            count += 1
+    print(f"{count} pages in {corpus}")
+
+
+def overlap(a: str, b: str) -> float:
+    """ Bag of words F1 between two texts, 1.0 is identical word counts """
+    a, b = Counter(a.lower().split()), Counter(b.lower().split())
+    common = sum((a & b).values())
+    if common == 0:
+        return 1.0 if not a and not b else 0.0
+    precision = common / sum(a.values())
+    recall = common / sum(b.values())
+    return 2 * precision * recall / (precision + recall)
+
+
+def timed(fn, *args, repeat: int = 1):
+    """ Returns (result, best seconds over repeat runs) """
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        ret = fn(*args)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return ret, best
+
+
+def run(corpus: str, repeat: int, verbose: bool) -> None:
+    """ Times both engines on each saved page and reports speedup and text overlap """
+    pages = load_index(corpus)
+    if not pages:
+        sys.exit(f"No saved pages in {corpus}, run 'save' first")
+
+    extractor = ArticleExtractor()
+    news_utils = NewsUtils()
+    rows = []
+    for name, url, encoding in pages:
+        with open(os.path.join(corpus, name), "rb") as f:
+            html = f.read()
+
+        # The production fallback itself, so the comparison can't drift from what parse_maintext_title runs
+        reference, newspaper_time = timed(news_utils._parse_newspaper, url, html, encoding, repeat=repeat)
+        fast, fast_time = timed(extractor.extract, html, url, encoding, repeat=repeat)
+
+        if fast is None:
+            # Fallback path in production is the fast attempt followed by newspaper
+            path = "fallback"
+            fast_time += newspaper_time
+            fast = reference
+        else:
+            rule = tldextract.extract(url).registered_domain in ArticleExtractor.SITE_RULES
+            path = "site rule" if rule else "scored"
+        text_overlap = overlap(fast["maintext"], reference["maintext"])
+        # Titles feed parse_keywords and so the similar articles shown to users, compare them separately
+        title_match = " ".join(fast["title"].split()) == " ".join(reference["title"].split())
+        title_overlap = overlap(fast["title"], reference["title"])
+
+        rows.append((url, path, newspaper_time, fast_time, text_overlap, title_match, title_overlap))
+        if verbose:
+            print(f"{path:<10}{newspaper_time * 1000:>10.1f}ms{fast_time * 1000:>10.1f}ms{text_overlap:>8.2f}{title_overlap:>8.2f}  {url}")
+            if not title_match:
+                print(f"{'':<10}title {fast['title']!r}, newspaper {reference['title']!r}")
+
+    newspaper_total = sum(r[2] for r in rows)
+    fast_total = sum(r[3] for r in rows)
+    print(f"pages:            {len(rows)}")
+    for path in ["site rule", "scored", "fallback"]:
+        print(f"  {path + ':':<16}{sum(1 for r in rows if r[1] == path)}")
+    print(f"newspaper total:  {newspaper_total:.3f}s (median {median(r[2] for r in rows) * 1000:.1f}ms)")
+    print(f"extractor total:  {fast_total:.3f}s (median {median(r[3] for r in rows) * 1000:.1f}ms)")
+    print(f"speedup:          {newspaper_total / fast_total:.1f}x")
+    extracted = [r for r in rows if r[1] != "fallback"]
+    if extracted:
+        print(f"text overlap:     mean {mean(r[4] for r in extracted):.3f}, min {min(r[4] for r in extracted):.3f} (extracted pages only)")
+        print(
+            f"title overlap:    mean {mean(r[6] for r in extracted):.3f}, min {min(r[6] for r in extracted):.3f}, "
+            f"exact {sum(1 for r in extracted if r[5])}/{len(extracted)} (extracted pages only)"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Article extraction benchmark")
+    parser.add_argument("--corpus", default=CORPUS, help="directory of saved html pages")
+    sub = parser.add_subparsers(dest="command", required=True)
+    save_parser = sub.add_parser("save", help="download pages into the corpus")
+    save_parser.add_argument("urls", help="text file with one url per line")
+    run_parser = sub.add_parser("run", help="run the benchmark")
+    run_parser.add_argument("--repeat", type=int, default=3, help="runs per page, best time is kept")
+    run_parser.add_argument("-v", "--verbose", action="store_true", help="print per page results")
+    args = parser.parse_args()
+
+    if args.command == "save":
+        save(args.urls, args.corpus)
+    else:
+        run(args.corpus, args.repeat, args.verbose)
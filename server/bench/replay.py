@@ -0,0 +1,627 @@
+"""
+End to end replay benchmark of the OpBop server against local stand-ins for everything upstream:
+a fake news site serving recorded html, a fake Google News RSS feed, a fake OpenAI API and mongomock
+
+usage (from server/):
+    python bench/replay.py --requests 200 --concurrency 8 --output before.json
+    python bench/replay.py --traffic before.traffic.jsonl --compare before.json
+
+Pages come from the extraction benchmark corpus (bench/extraction.py save), synthetic pages are used if it is empty
+Pass the same --traffic file (written next to --output) to compare runs across commits,
+--compare refuses to run when the traffic, pages or stub settings differ from the baseline
+Outbound HTTP is intercepted at the transport layer, so the harness works on commits with different fetch code
+
+Needs the nltk stopwords and punkt data, which the app downloads at import time and can't once traffic is
+intercepted. They are fetched before the run if missing, offline machines need them installed beforehand
+(python -m nltk.downloader stopwords punkt, or NLTK_DATA pointing at a copy)
+"""
+import argparse
+import hashlib
+import json
+import logging
+import math
+import os
+import random
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import wraps
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, quote, urlsplit
+from urllib.request import BaseHandler, ProxyHandler, build_opener, install_opener
+from xml.sax.saxutils import escape
+
+SERVER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, SERVER_DIR)
+# main.py loads reliability.tsv relative to the working directory
+os.chdir(SERVER_DIR)
+
+import mongomock
+import nltk
+import openai
+import requests
+import tldextract
+from requests.adapters import HTTPAdapter
+from werkzeug.serving import make_server
+from flask import request as flask_request
+
+from corpus import CORPUS, load_index
+
+# Imported in run, once upstream traffic is intercepted, since it calls nltk.download() at import time
+main = None
+
+ENDPOINTS = ["dothething", "parsearticle", "findcached", "shorten", "simplify", "findsimilar"]
+DEFAULT_MIX = "dothething=6,parsearticle=1,findcached=2,shorten=1"
+MISS_PARAM = "opbop_bench"
+NLTK_DATA = {
+    "stopwords": "corpora/stopwords",
+    "punkt": "tokenizers/punkt"
+}
+# Options that change what the server sees, runs are only comparable when these match
+RUN_OPTIONS = ["concurrency", "warmup", "site_latency", "openai_latency", "openai_max_words", "rss_items"]
+WORDS = (
+    "government officials said the new policy would affect thousands of residents across the region "
+    "while critics argued that the plan lacked funding and public support after months of debate"
+).split()
+
+
+class Recorder:
+    """ Collects client side request latencies and server side stage timings """
+
+    def __init__(self):
+        self.local = threading.local()
+        self.requests = []
+        self.stages = []
+        self.enabled = False
+
+    def request(self, endpoint: str, status: int, seconds: float) -> None:
+        if self.enabled:
+            self.requests.append((endpoint, status, seconds))
+
+    def stage(self, stage: str, seconds: float) -> None:
+        if self.enabled:
+            self.stages.append((getattr(self.local, "endpoint", None), stage, seconds))
+
+
+class Stubs:
+    """
+    Local stand-ins for the news sites, Google News RSS and OpenAI, all served from one threaded http server
+    Intercepted requests arrive at /upstream with their original url and are routed by its host
+    """
+
+    def __init__(self, pages: dict, site_latency: float, openai_latency: float, openai_max_words: int, rss_items: int):
+        self.pages = pages
+        self.urls = sorted(pages)
+        self.titles = {}
+        self.site_latency = site_latency
+        self.openai_latency = openai_latency
+        self.openai_max_words = openai_max_words
+        self.rss_items = rss_items
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self.server.daemon_threads = True
+        self.base = f"http://127.0.0.1:{self.server.server_port}"
+
+    def start(self) -> None:
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def stop(self) -> None:
+        self.server.shutdown()
+
+    def is_local(self, url: str) -> bool:
+        return urlsplit(url).hostname in ["127.0.0.1", "localhost"]
+
+    def local_url(self, url: str) -> str:
+        """ Rewrites an outbound url to the stub server """
+        return f"{self.base}/upstream?url={quote(url, safe='')}"
+
+    def page(self, url: str) -> tuple:
+        """ Recorded (html bytes, header charset) for url, ignoring the cache miss marker added by the traffic generator """
+        url = url.split(f"?{MISS_PARAM}=")[0].split(f"&{MISS_PARAM}=")[0]
+        return self.pages.get(url)
+
+    def rss(self, query: str) -> str:
+        """ Google News style RSS, item children in the order NewsUtils.RSS_INDEX expects """
+        start = sum(map(ord, query)) % len(self.urls)
+        items = []
+        for i in range(min(self.rss_items, len(self.urls))):
+            url = self.urls[(start + i) % len(self.urls)]
+            title = escape(self.titles.get(url, url))
+            items.append(
+                f"<item><title>{title}</title><link>{escape(url)}</link><guid>{escape(url)}</guid>"
+                f"<pubDate>Sat, 21 Aug 2021 12:00:00 GMT</pubDate><description>{title}</description>"
+                f"<source url=\"{escape(url)}\">{escape(urlsplit(url).netloc)}</source></item>"
+            )
+        return f"<?xml version=\"1.0\" encoding=\"UTF-8\"?><rss version=\"2.0\"><channel>{''.join(items)}</channel></rss>"
+
+    def completion(self, engine: str, body: dict) -> tuple:
+        """ Returns (status, json) mimicking the completions API, including its context length error """
+        prompt = body.get("prompt", "")
+        if len(prompt.split()) > self.openai_max_words:
+            return 400, {"error": {
+                "message": "This model's maximum context length is 2049 tokens",
+                "type": "invalid_request_error",
+                "param": None,
+                "code": None
+            }}
+        if engine == "content-filter-alpha-c4":
+            text = "0"
+        else:
+            text = " ".join(prompt.split()[:body.get("max_tokens", 16)])
+        return 200, {
+            "id": "cmpl-bench",
+            "object": "text_completion",
+            "created": int(time.time()),
+            "model": engine,
+            "choices": [{"text": text, "index": 0, "logprobs": None, "finish_reason": "stop"}]
+        }
+
+    def _handler(self):
+        stubs = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                url = self._upstream_url()
+                if url is None:
+                    return self._send(404, "text/plain", "Not found")
+                parts = urlsplit(url)
+                if parts.hostname == "news.google.com":
+                    time.sleep(stubs.site_latency)
+                    query = parse_qs(parts.query).get("q", [""])[0]
+                    return self._send(200, "application/xml", stubs.rss(query))
+                page = stubs.page(url)
+                if page is None:
+                    return self._send(404, "text/html", "Not found")
+                time.sleep(stubs.site_latency)
+                html, encoding = page
+                self._send(200, f"text/html; charset={encoding}" if encoding else "text/html", html)
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or "{}")
+                url = self._upstream_url()
+                parts = urlsplit(url or "").path.strip("/").split("/")
+                if urlsplit(url or "").hostname == "api.openai.com" and len(parts) == 4 and parts[1:4:2] == ["engines", "completions"]:
+                    time.sleep(stubs.openai_latency)
+                    status, ret = stubs.completion(parts[2], body)
+                    return self._send(status, "application/json", json.dumps(ret))
+                self._send(404, "text/plain", "Not found")
+
+            def _upstream_url(self) -> str:
+                parts = urlsplit(self.path)
+                if parts.path != "/upstream":
+                    return None
+                return parse_qs(parts.query).get("url", [None])[0]
+
+            def _send(self, status: int, content_type: str, data):
+                if isinstance(data, str):
+                    data = data.encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+
+class StubHandler(BaseHandler):
+    """ urllib counterpart of the requests adapter patch, rewrites outbound urls before the request is sent """
+    handler_order = 100
+
+    def __init__(self, stubs: Stubs):
+        self.stubs = stubs
+
+    def http_request(self, req):
+        if not self.stubs.is_local(req.full_url):
+            req.full_url = self.stubs.local_url(req.full_url)
+        return req
+
+    https_request = http_request
+
+
+def intercept_upstreams(stubs: Stubs) -> None:
+    """
+    Sends every outbound HTTP request not addressed to this machine to the stubs
+    Patches the transport (requests' HTTPAdapter and urllib's default opener) rather than any OpBop module,
+    so the app's fetch code can change between commits and still never reach the real network
+    """
+    send = HTTPAdapter.send
+
+    @wraps(send)
+    def stubbed_send(adapter, request, **kwargs):
+        if not stubs.is_local(request.url):
+            request.url = stubs.local_url(request.url)
+            kwargs["proxies"] = {}
+        return send(adapter, request, **kwargs)
+
+    HTTPAdapter.send = stubbed_send
+    install_opener(build_opener(ProxyHandler({}), StubHandler(stubs)))
+
+
+def positive_int(value: str) -> int:
+    """ argparse type for options that need at least one """
+    ret = int(value)
+    if ret < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, got {ret}")
+    return ret
+
+
+def missing_nltk_data() -> list:
+    missing = []
+    for name, path in NLTK_DATA.items():
+        try:
+            nltk.data.find(path)
+        except LookupError:
+            missing.append(name)
+    return missing
+
+
+def prepare_upstream_data() -> None:
+    """
+    Fetches what the app would otherwise download from the real network once upstream traffic is intercepted:
+    the nltk data it needs and tldextract's public suffix list
+    """
+    for name in missing_nltk_data():
+        nltk.download(name, quiet=True)
+    missing = missing_nltk_data()
+    if missing:
+        sys.exit(
+            f"Missing nltk data: {', '.join(missing)}\n"
+            f"Install it with 'python -m nltk.downloader {' '.join(missing)}' or point NLTK_DATA at a copy"
+        )
+
+    # Loads the suffix list into the default extractor main uses, falling back to the bundled snapshot when offline
+    tld_log = logging.getLogger("tldextract")
+    level = tld_log.level
+    tld_log.setLevel(logging.CRITICAL)
+    try:
+        tldextract.extract("https://example.com")
+    finally:
+        tld_log.setLevel(level)
+
+
+def load_pages(corpus: str, count: int, seed: int) -> dict:
+    """ {url: (html bytes, header charset)} from the saved corpus, or synthetic article pages if there is none """
+    pages = {}
+    for name, url, encoding in load_index(corpus):
+        with open(os.path.join(corpus, name), "rb") as f:
+            pages[url] = (f.read(), encoding)
+    if pages:
+        return pages
+
+    rng = random.Random(seed)
+    for i in range(count):
+        paragraphs = []
+        for _ in range(rng.randint(8, 20)):
+            sentences = [" ".join(rng.choice(WORDS) for _ in range(rng.randint(8, 25))).capitalize() + "." for _ in range(rng.randint(2, 5))]
+            paragraphs.append(f"<p>{' '.join(sentences)}</p>")
+        title = " ".join(rng.choice(WORDS) for _ in range(6)).capitalize()
+        html = (
+            f"<html><head><title>{title}</title></head><body><nav><a href='/'>Home</a></nav>"
+            f"<article><h1>{title}</h1>{''.join(paragraphs)}</article><footer>Example News</footer></body></html>"
+        )
+        pages[f"https://example-news.com/2021/08/{i}/story.html"] = (html.encode("utf-8"), "utf-8")
+    return pages
+
+
+def instrument(owner, name: str, stage, recorder: Recorder) -> None:
+    """ Wraps owner.name so every call is recorded as a stage, stage may be a function of the call's kwargs """
+    fn = getattr(owner, name)
+
+    @wraps(fn)
+    def timed(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            recorder.stage(stage(kwargs) if callable(stage) else stage, time.perf_counter() - start)
+
+    setattr(owner, name, timed)
+
+
+def wire_app(recorder: Recorder) -> None:
+    """ Swaps main's database for mongomock and instruments each pipeline stage """
+    openai.api_key = "bench"
+    main.dao.db = mongomock.MongoClient().get_database("flask_mongodb_atlas")
+    main.app.debug = False
+    logging.getLogger("werkzeug").setLevel(logging.ERROR)
+
+    @main.app.before_request
+    def tag_endpoint():
+        recorder.local.endpoint = flask_request.path
+
+    instrument(main.news_utils, "parse_maintext_title", "parse_article", recorder)
+    instrument(main.news_utils, "parse_keywords", "keywords", recorder)
+    instrument(main.news_utils, "similar_articles", "similar_articles", recorder)
+    instrument(main, "summarize", "summarize", recorder)
+    instrument(openai.Completion, "create", lambda kwargs: f"openai:{kwargs.get('engine')}", recorder)
+    instrument(main.dao, "find_by_url", "db_find", recorder)
+    instrument(main.dao, "insert_article", "db_insert", recorder)
+
+
+def seed_cache(urls: list) -> None:
+    """ Inserts cached results for urls, so requests for them take the cache hit path """
+    for url in urls:
+        main.dao.insert_article({
+            "url": url.lower(),
+            "tldr": "Cached summary.",
+            "reduction": 50,
+            "simplified": "Cached simplified text.",
+            "sensitivity": "0",
+            "reliability": "unknown"
+        })
+
+
+def request_body(endpoint: str, url: str, texts: dict) -> dict:
+    """ Body the frontend would send to endpoint for the article at url """
+    if endpoint == "dothething":
+        return {"url": url, "articleRange": None, "filterExplicit": "2", "blacklist": []}
+    if endpoint in ["parsearticle", "findcached"]:
+        return {"url": url}
+    if endpoint in ["shorten", "simplify"]:
+        return {"maintext": texts[url]["maintext"]}
+    return {"keywords": texts[url]["keywords"], "recency": 0, "blacklist": []}
+
+
+def generate_traffic(args, urls: list, hit_urls: list, texts: dict) -> list:
+    """
+    Builds a reproducible request sequence from the mix weights
+    Cache misses get a unique url, duplicate bursts repeat one request back to back
+    """
+    rng = random.Random(args.seed)
+    weights = {}
+    for part in args.mix.split(","):
+        endpoint, weight = part.split("=")
+        if endpoint not in ENDPOINTS:
+            sys.exit(f"Unknown endpoint '{endpoint}' in --mix, expected one of {', '.join(ENDPOINTS)}")
+        weights[endpoint] = float(weight)
+
+    traffic = []
+    misses = 0
+    while len(traffic) < args.requests:
+        endpoint = rng.choices(list(weights), list(weights.values()))[0]
+        if hit_urls and rng.random() < args.hit_ratio:
+            url = rng.choice(hit_urls)
+        else:
+            base = rng.choice(urls)
+            url = f"{base}{'&' if '?' in base else '?'}{MISS_PARAM}={misses}"
+            texts[url] = texts[base]
+            misses += 1
+        entry = {"endpoint": endpoint, "body": request_body(endpoint, url, texts)}
+        burst = args.burst_size if rng.random() < args.burst_ratio else 1
+        traffic.extend([entry] * burst)
+    return traffic[:args.requests]
+
+
+def load_traffic(path: str) -> tuple:
+    """ Returns (cached urls, requests) from a traffic file, the first line records the urls seeded into the cache """
+    with open(path) as f:
+        lines = [json.loads(line) for line in f if line.strip()]
+    if not lines or "cached" not in lines[0]:
+        sys.exit(f"{path} has no cache header line, regenerate it with this version of the harness")
+    return lines[0]["cached"], lines[1:]
+
+
+def save_traffic(path: str, hit_urls: list, traffic: list) -> None:
+    with open(path, "w") as f:
+        f.write(json.dumps({"cached": hit_urls}) + "\n")
+        f.writelines(json.dumps(entry) + "\n" for entry in traffic)
+
+
+def digest(data) -> str:
+    """ Short stable fingerprint of json serializable data """
+    return hashlib.sha256(json.dumps(data, sort_keys=True).encode("utf-8")).hexdigest()[:16]
+
+
+def pages_digest(pages: dict) -> str:
+    sha = hashlib.sha256()
+    for url in sorted(pages):
+        html, encoding = pages[url]
+        sha.update(f"{url}\t{encoding}\n".encode("utf-8"))
+        sha.update(html)
+    return sha.hexdigest()[:16]
+
+
+def check_comparable(args, baseline: dict, fingerprints: dict) -> None:
+    """ Refuses to run against a baseline recorded with different traffic, pages or stub settings """
+    problems = [
+        f"{option}: {baseline['config'].get(option)} in baseline, {getattr(args, option)} now"
+        for option in RUN_OPTIONS if baseline["config"].get(option) != getattr(args, option)
+    ]
+    problems += [
+        f"{name}: {baseline.get(name)} in baseline, {value} now"
+        for name, value in fingerprints.items() if baseline.get(name) != value
+    ]
+    if not problems:
+        return
+    message = f"Run is not comparable to {args.compare}:\n  " + "\n  ".join(problems)
+    if not args.force:
+        sys.exit(message + "\nReplay the baseline's traffic file with the same options, or pass --force")
+    print(f"Warning: {message}", file=sys.stderr)
+
+
+def percentile(values: list, p: float) -> float:
+    """ Nearest rank percentile """
+    values = sorted(values)
+    return values[max(0, math.ceil(p / 100 * len(values)) - 1)]
+
+
+def summarize_results(recorder: Recorder, wall: float) -> dict:
+    """ Throughput, latency percentiles per endpoint and stage breakdown per endpoint """
+    ret = {
+        "wall_seconds": wall,
+        "throughput": len(recorder.requests) / wall,
+        "endpoints": {}
+    }
+    for endpoint in sorted({r[0] for r in recorder.requests}):
+        latencies = [r[2] for r in recorder.requests if r[0] == endpoint]
+        path = f"/api/{endpoint}"
+        stages = {}
+        for stage in sorted({s[1] for s in recorder.stages if s[0] == path}):
+            times = [s[2] for s in recorder.stages if s[0] == path and s[1] == stage]
+            stages[stage] = {
+                "calls": len(times),
+                "mean_ms": 1000 * sum(times) / len(times),
+                "p95_ms": 1000 * percentile(times, 95),
+                "per_request_ms": 1000 * sum(times) / len(latencies)
+            }
+        ret["endpoints"][endpoint] = {
+            "count": len(latencies),
+            "errors": sum(1 for r in recorder.requests if r[0] == endpoint and r[1] != 200),
+            "mean_ms": 1000 * sum(latencies) / len(latencies),
+            "p50_ms": 1000 * percentile(latencies, 50),
+            "p95_ms": 1000 * percentile(latencies, 95),
+            "p99_ms": 1000 * percentile(latencies, 99),
+            "stages": stages
+        }
+    return ret
+
+
+def report(results: dict, baseline: dict = None) -> None:
+    """ Prints the results, with percentage change against baseline if given """
+    def delta(new, old):
+        return f" ({100 * (new - old) / old:+.0f}%)" if old else ""
+
+    old = baseline["results"] if baseline else {"endpoints": {}}
+    print(f"commit {results['commit']}" + (f", compared to {baseline['commit']}" if baseline else ""))
+    print(f"throughput: {results['throughput']:.1f} req/s{delta(results['throughput'], old.get('throughput'))}")
+    print(f"\n{'endpoint':<14}{'count':>7}{'errors':>8}  {'p50 ms':>10}{'':8}{'p95 ms':>10}{'':8}{'p99 ms':>10}")
+    for endpoint, stats in results["endpoints"].items():
+        prev = old["endpoints"].get(endpoint, {})
+        cols = "".join(f"{stats[k]:>10.1f}{delta(stats[k], prev.get(k)):<8}" for k in ["p50_ms", "p95_ms", "p99_ms"])
+        print(f"{endpoint:<14}{stats['count']:>7}{stats['errors']:>8}  {cols}")
+
+    for endpoint, stats in results["endpoints"].items():
+        if not stats["stages"]:
+            continue
+        print(f"\n{endpoint} stages{'calls':>20}{'mean ms':>10}{'p95 ms':>10}{'ms/request':>12}")
+        for stage, s in stats["stages"].items():
+            print(f"  {stage:<30}{s['calls']:>7}{s['mean_ms']:>10.1f}{s['p95_ms']:>10.1f}{s['per_request_ms']:>12.1f}")
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def run(args, baseline: dict = None) -> dict:
+    """ Starts the stubs and the app, replays the traffic and returns the results """
+    global main
+    pages = load_pages(args.corpus, args.pages, args.seed)
+    if not pages:
+        sys.exit(f"No pages to serve, {args.corpus} has no saved pages and no synthetic pages were generated")
+    stubs = Stubs(pages, args.site_latency / 1000, args.openai_latency / 1000, args.openai_max_words, args.rss_items)
+    stubs.start()
+    prepare_upstream_data()
+    intercept_upstreams(stubs)
+    # Data is already in place, skip newsutils' nltk.download() rather than have it fail against the stubs
+    download = nltk.download
+    nltk.download = lambda *args, **kwargs: True
+    try:
+        import main
+    finally:
+        nltk.download = download
+    recorder = Recorder()
+    wire_app(recorder)
+
+    # Article text and keywords for request bodies, parsed through the stubs like the app would
+    texts = {}
+    for url in stubs.urls:
+        parsed = main.news_utils.parse_maintext_title(url)
+        stubs.titles[url] = parsed["title"]
+        texts[url] = {"maintext": parsed["maintext"], "keywords": main.news_utils.parse_keywords(parsed["title"])}
+
+    if args.traffic and os.path.exists(args.traffic):
+        hit_urls, traffic = load_traffic(args.traffic)
+    else:
+        rng = random.Random(args.seed)
+        hit_urls = rng.sample(stubs.urls, max(1, round(len(stubs.urls) * args.cached_share))) if args.hit_ratio > 0 else []
+        traffic = generate_traffic(args, stubs.urls, hit_urls, texts)
+        if args.traffic or args.output:
+            save_traffic(args.traffic or f"{os.path.splitext(args.output)[0]}.traffic.jsonl", hit_urls, traffic)
+    seed_cache(hit_urls)
+
+    fingerprints = {
+        "traffic_digest": digest({"cached": hit_urls, "requests": traffic}),
+        "pages_digest": pages_digest(pages)
+    }
+    if baseline is not None:
+        check_comparable(args, baseline, fingerprints)
+
+    server = make_server("127.0.0.1", 0, main.app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    app_url = f"http://127.0.0.1:{server.server_port}"
+
+    def send(entry: dict) -> None:
+        start = time.perf_counter()
+        try:
+            status = requests.post(f"{app_url}/api/{entry['endpoint']}", json=entry["body"], timeout=args.timeout).status_code
+        except requests.RequestException:
+            status = 0
+        recorder.request(entry["endpoint"], status, time.perf_counter() - start)
+
+    with ThreadPoolExecutor(args.concurrency) as pool:
+        list(pool.map(send, traffic[:args.warmup]))
+        recorder.enabled = True
+        start = time.perf_counter()
+        list(pool.map(send, traffic[args.warmup:]))
+        wall = time.perf_counter() - start
+
+    server.shutdown()
+    stubs.stop()
+
+    results = summarize_results(recorder, wall)
+    results["commit"] = git_commit()
+    results.update(fingerprints)
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="OpBop server replay benchmark")
+    parser.add_argument("--corpus", default=CORPUS, help="saved html pages, see bench/extraction.py")
+    parser.add_argument("--pages", type=positive_int, default=20, help="synthetic pages to generate when the corpus is empty")
+    parser.add_argument("--traffic", help="replay this traffic file, or write the generated traffic to it if missing")
+    parser.add_argument("--requests", type=positive_int, default=200, help="generated requests, including warmup")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="endpoint weights, e.g. dothething=6,findcached=2")
+    parser.add_argument("--hit-ratio", type=float, default=0.5, help="share of requests for cached urls")
+    parser.add_argument("--cached-share", type=float, default=0.3, help="share of corpus urls seeded into the cache")
+    parser.add_argument("--burst-ratio", type=float, default=0.1, help="share of requests sent as a duplicate burst")
+    parser.add_argument("--burst-size", type=positive_int, default=5, help="identical requests per burst")
+    parser.add_argument("--concurrency", type=positive_int, default=4, help="concurrent client connections")
+    parser.add_argument("--warmup", type=int, default=10, help="leading requests excluded from results")
+    parser.add_argument("--timeout", type=float, default=60, help="client timeout per request, in seconds")
+    parser.add_argument("--site-latency", type=float, default=50, help="fake news site and RSS latency, in ms")
+    parser.add_argument("--openai-latency", type=float, default=500, help="fake OpenAI latency, in ms")
+    parser.add_argument("--openai-max-words", type=int, default=1500, help="prompts longer than this get a context length error")
+    parser.add_argument("--rss-items", type=int, default=10, help="items in each fake RSS response")
+    parser.add_argument("--seed", type=int, default=0, help="random seed for pages and traffic")
+    parser.add_argument("--output", help="write results as json")
+    parser.add_argument("--compare", help="results json from an earlier run to compare against")
+    parser.add_argument("--force", action="store_true", help="compare even if the baseline ran different traffic or settings")
+    args = parser.parse_args()
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+
+    results = run(args, baseline)
+    output = {
+        "commit": results["commit"],
+        "traffic_digest": results["traffic_digest"],
+        "pages_digest": results["pages_digest"],
+        "config": vars(args),
+        "results": results
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(output, f, indent=4)
+    report(results, baseline)
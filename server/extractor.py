@@ -0,0 +1,161 @@
+import re
+import tldextract
+from bs4 import UnicodeDammit
+from lxml import etree, html as lxml_html
+
+
+class ArticleExtractor:
+    """
+    Lightweight article extraction for OpBop
+    Uses per-site rules for our top publishers and readability style scoring for everything else
+    """
+    MIN_TEXT_LENGTH = 250
+    MIN_PARAGRAPH_LENGTH = 25
+    MIN_CONFIDENCE = 0.5
+    JUNK_TAGS = ["script", "style", "noscript", "iframe", "button", "svg", "nav", "footer", "aside", "figure"]
+    POSITIVE = re.compile(r"article|body|content|entry|main|page|post|story|text", re.I)
+    NEGATIVE = re.compile(r"ad-|advert|comment|footer|menu|meta|newsletter|nav|promo|related|share|sidebar|social|sponsor|widget", re.I)
+    TAG_WEIGHTS = {
+        "article": 10,
+        "div": 5,
+        "section": 3,
+        "main": 3,
+        "td": 3,
+        "blockquote": 3,
+        "ul": -3,
+        "ol": -3,
+        "li": -3,
+        "header": -5,
+        "form": -5
+    }
+    # XPaths for the body paragraphs of our most frequently requested publishers
+    SITE_RULES = {
+        "apnews.com": "//div[contains(@class, 'RichTextStoryBody')]//p",
+        "cnn.com": "//div[contains(@class, 'article__content')]//p | //div[contains(@class, 'zn-body__paragraph')]",
+        "nytimes.com": "//section[@name='articleBody']//p",
+        "reuters.com": "//div[contains(@class, 'article-body')]//p | //p[@data-testid and starts-with(@data-testid, 'paragraph-')]",
+        "bbc.com": "//article//div[@data-component='text-block']//p",
+        "bbc.co.uk": "//article//div[@data-component='text-block']//p",
+        "theguardian.com": "//div[@id='maincontent']//p | //div[contains(@class, 'article-body')]//p",
+        "washingtonpost.com": "//div[contains(@class, 'article-body')]//p",
+        "foxnews.com": "//div[contains(@class, 'article-body')]/p",
+        "npr.org": "//div[@id='storytext']/p",
+        "cbc.ca": "//div[contains(@class, 'story')]/p"
+    }
+
+    def extract(self, html: bytes, url: str, encoding: str = None) -> dict:
+        """
+        Extracts main text and title from raw html bytes
+        encoding is the charset from the HTTP header, if it declared one
+        Returns None when not confident in the result, so caller can fall back to newspaper
+        """
+        # Same charset detection newspaper uses: header, then meta tags, then utf-8 and windows-1252
+        detected = UnicodeDammit(html, [encoding] if encoding else [], is_html=True).original_encoding
+        try:
+            doc = lxml_html.fromstring(html, parser=lxml_html.HTMLParser(encoding=detected))
+        except etree.ParserError:
+            return None
+        for el in doc.xpath("|".join(f"//{tag}" for tag in ArticleExtractor.JUNK_TAGS)):
+            el.drop_tree()
+
+        paragraphs = self._site_paragraphs(doc, url)
+        confidence = 1.0
+        if not paragraphs:
+            paragraphs, confidence = self._scored_paragraphs(doc)
+
+        maintext = "\n\n".join(paragraphs)
+        if len(maintext) < ArticleExtractor.MIN_TEXT_LENGTH or confidence < ArticleExtractor.MIN_CONFIDENCE:
+            return None
+
+        return {
+            "maintext": maintext,
+            "title": self._title(doc)
+        }
+
+    def _site_paragraphs(self, doc, url: str) -> list:
+        """ extract helper - Applies the site specific rule for url's domain, if there is one """
+        rule = ArticleExtractor.SITE_RULES.get(tldextract.extract(url).registered_domain)
+        if rule is None:
+            return []
+        return [t for t in (self._clean_text(el) for el in doc.xpath(rule)) if t]
+
+    def _scored_paragraphs(self, doc) -> tuple:
+        """
+        extract helper - Readability style content scoring
+        Paragraphs award points to their parent and grandparent, best scoring node is the article body
+        Confidence is the share of the page's paragraph text that lives in the chosen node
+        """
+        scores = {}
+        total_length = 0
+        for p in doc.iter("p", "pre"):
+            text = self._clean_text(p)
+            if len(text) < ArticleExtractor.MIN_PARAGRAPH_LENGTH:
+                continue
+            total_length += len(text)
+            points = 1 + text.count(",") + min(len(text) // 100, 3)
+
+            parent = p.getparent()
+            if parent is None:
+                continue
+            grandparent = parent.getparent()
+            for node, share in [(parent, 1), (grandparent, 0.5)]:
+                if node is None:
+                    continue
+                if node not in scores:
+                    scores[node] = self._node_weight(node)
+                scores[node] += points * share
+
+        if not scores:
+            return [], 0.0
+
+        for node in scores:
+            scores[node] *= 1 - self._link_density(node)
+        best = max(scores, key=scores.get)
+
+        # Siblings of the best node that also scored well are usually split article bodies
+        parent = best.getparent()
+        threshold = max(10, scores[best] * 0.2)
+        nodes = [best] if parent is None else [
+            node for node in parent if node is best or scores.get(node, 0) >= threshold
+        ]
+
+        paragraphs = []
+        for node in nodes:
+            for p in node.iter("p", "pre"):
+                text = self._clean_text(p)
+                if len(text) >= ArticleExtractor.MIN_PARAGRAPH_LENGTH and self._link_density(p) < 0.5:
+                    paragraphs.append(text)
+
+        confidence = sum(len(p) for p in paragraphs) / total_length if total_length else 0.0
+        return paragraphs, confidence
+
+    def _node_weight(self, node) -> float:
+        """ _scored_paragraphs helper - Initial score of a node from its tag, class and id """
+        weight = ArticleExtractor.TAG_WEIGHTS.get(node.tag, 0)
+        attrs = f"{node.get('class', '')} {node.get('id', '')}"
+        if ArticleExtractor.NEGATIVE.search(attrs):
+            weight -= 25
+        if ArticleExtractor.POSITIVE.search(attrs):
+            weight += 25
+        return weight
+
+    def _link_density(self, node) -> float:
+        """ Fraction of a node's text that sits inside links """
+        length = len(node.text_content())
+        if length == 0:
+            return 0.0
+        return sum(len(a.text_content()) for a in node.iter("a")) / length
+
+    def _title(self, doc) -> str:
+        """ extract helper - Title from og:title, falling back to first h1 then the title tag """
+        for path in ["//meta[@property='og:title']/@content", "//h1", "//title"]:
+            hits = doc.xpath(path)
+            if hits:
+                title = hits[0] if isinstance(hits[0], str) else self._clean_text(hits[0])
+                if title.strip():
+                    return title.strip()
+        return ""
+
+    def _clean_text(self, el) -> str:
+        """ Text content of an element with whitespace collapsed """
+        return " ".join(el.text_content().split())
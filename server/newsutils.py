@@ -11,12 +11,14 @@ import math
 
 # Scraping
 from newspaper import Article
+from newspaper.article import ArticleException
 import requests
 import xml.etree.ElementTree as ET
 from urllib.request import urlopen
 from urllib.parse import urlparse
 from urllib.error import HTTPError
-from bs4 import BeautifulSoup
+from bs4 import BeautifulSoup, UnicodeDammit
+from extractor import ArticleExtractor
 
 
 class NewsUtils:
@@ -28,14 +30,50 @@ class NewsUtils:
         "url": 1,
         "source": 5
     }
+    HEADERS = {
+        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/92.0.4515.159 Safari/537.36"
+    }
+    TIMEOUT = 10
+
+    def __init__(self):
+        self.extractor = ArticleExtractor()
 
     def parse_maintext_title(self, url: str) -> dict:
-        """ Gets the main body of text from an article, given url """
+        """
+        Gets the main body of text from an article, given url
+        Tries the lightweight extractor first, full newspaper pipeline if it isn't confident
+        """
+        response = requests.get(url, headers=NewsUtils.HEADERS, timeout=NewsUtils.TIMEOUT)
+        if not response.ok:
+            raise ArticleException(f"Article `download()` failed with {response.status_code} {response.reason} on URL {url}")
+
+        encoding = NewsUtils.header_encoding(response)
+        ret = self.extractor.extract(response.content, url, encoding)
+        if ret is None:
+            ret = self._parse_newspaper(url, response.content, encoding)
+        ret["maintext"] = ret["maintext"].replace("\n", "")
+        return ret
+
+    @staticmethod
+    def header_encoding(response) -> str:
+        """
+        Charset declared in the response's Content-Type header, None if there isn't one
+        requests assumes ISO-8859-1 for text/html without a charset, so response.encoding alone can't be trusted
+        """
+        if "charset" in response.headers.get("content-type", "").lower():
+            return response.encoding
+        return None
+
+    def _parse_newspaper(self, url: str, html: bytes, encoding: str = None) -> dict:
+        """
+        parse_maintext_title helper, newspaper fallback on already downloaded html
+        Decoded here with the header charset, newspaper only sees meta tags when handed bytes
+        """
         article = Article(url)
-        article.download()
+        article.download(input_html=UnicodeDammit(html, [encoding] if encoding else [], is_html=True).unicode_markup)
         article.parse()
         return {
-            "maintext": article.text.replace("\n", ""),
+            "maintext": article.text,
             "title": article.title
         }
 